@@ -27,6 +27,7 @@ class TrainConfigs(BaseConfigs):
     - ``discount_factor``: the discount factor to use for learning.
     - ``use_float``: a bool to indicate whether to use float or double to store the value functions' values.
     - ``is_dry_run``: a bool to indicate whether to save or not the policy.
+    - ``start_from_shortest_paths``: a bool to indicate whether the starting policy moves the agent along the shortest paths to the target.
     - ``max_iter``: the maximum number of iterations before stopping the learning process.
     - ``value_function_tolerance``: if the maximum difference between the previous value functions' values and
     the next value functions' values is less than this value the learning process is stopped.
@@ -41,6 +42,7 @@ class TrainConfigs(BaseConfigs):
         self.__discount_factor: ConfigArgument[float] = ConfigArgument(0.5)
         self.__use_float: ConfigArgument[bool] = ConfigArgument(False)
         self.__is_dry_run: ConfigArgument[bool] = ConfigArgument(False)
+        self.__start_from_shortest_paths: ConfigArgument[bool] = ConfigArgument(False)
         self.__max_iter: ConfigArgument[int] = ConfigArgument(100)
         self.__value_function_tolerance: ConfigArgument[float] = ConfigArgument(0.0)
         self.__changed_actions_tolerance: ConfigArgument[int] = ConfigArgument(0)
@@ -86,6 +88,14 @@ class TrainConfigs(BaseConfigs):
     def is_dry_run(self, is_dry_run: bool) -> None:
         self.__is_dry_run.set_and_freeze(is_dry_run)
 
+    @property
+    def start_from_shortest_paths(self) -> bool:
+        return self.__start_from_shortest_paths.value
+
+    @start_from_shortest_paths.setter
+    def start_from_shortest_paths(self, start_from_shortest_paths: bool) -> None:
+        self.__start_from_shortest_paths.set_and_freeze(start_from_shortest_paths)
+
     @property
     def max_iter(self) -> int:
         return self.__max_iter.value
@@ -137,6 +147,10 @@ class TrainConfigs(BaseConfigs):
                 self.__use_float.set_if_not_frozen(True)
             case ["usedouble"]:
                 self.__use_float.set_if_not_frozen(False)
+            case ["shortestpathstart"]:
+                self.__start_from_shortest_paths.set_if_not_frozen(True)
+            case ["constantstart"]:
+                self.__start_from_shortest_paths.set_if_not_frozen(False)
             case ["densereward"]:
                 self.__reward_factory.set_if_not_frozen(lambda c: DenseRewardFunction())
             case ["sparsereward"]:
@@ -185,4 +199,6 @@ class TrainConfigs(BaseConfigs):
         else:
             self.valid_state_space = ValidStateSpaceParallel(self.map_size, self.obstacles)
             self.policy = PolicyParallel.from_action(self.valid_state_space.space_size)
-            self.value_functions_container = ValueFunctionsContainerParallel(self.valid_state_space.space_size, use_double=not self.use_float)
\ No newline at end of file
+            self.value_functions_container = ValueFunctionsContainerParallel(self.valid_state_space.space_size, use_double=not self.use_float)
+        if self.start_from_shortest_paths:
+            self.policy.fill_with_shortest_paths(self.valid_state_space)
\ No newline at end of file
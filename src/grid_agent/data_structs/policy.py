@@ -1,9 +1,37 @@
-from grid_agent.data_structs.simple_data import Action
+from grid_agent.data_structs.valid_state_space import ValidStateSpace
+from grid_agent.data_structs.simple_data import Action, Vec2D
 from ctypes import c_ubyte, Array
 import multiprocessing as mp
 from itertools import repeat
 from array import array
 from abc import ABC
+import numpy as np
+
+def _get_distances(occupied_cells: np.ndarray) -> np.ndarray:
+    """Return the length of the shortest paths between every pair of cells, avoiding the ``occupied_cells``.
+
+    ``occupied_cells`` is a boolean mask of shape (M, N).
+    The result has shape (N*M, M, N): its element [x0 + y0 * N, y1, x1] is the distance between (x0, y0) and (x1, y1),
+    or -1 if one of them is occupied or there is no path between them.
+    The breadth-first searches from all the cells advance together, one step at a time.
+    """
+    M, N = occupied_cells.shape
+    free: np.ndarray = ~occupied_cells
+    distances: np.ndarray = np.full((N * M, M, N), -1, dtype=np.int64)
+    frontier: np.ndarray = np.zeros((N * M, M, N), dtype=np.bool_)
+    free_cells: np.ndarray = np.flatnonzero(free)
+    frontier[free_cells, free_cells // N, free_cells % N] = True
+    distance: int = 0
+    while frontier.any():
+        distances[frontier] = distance
+        distance += 1
+        next_frontier: np.ndarray = np.zeros_like(frontier)
+        next_frontier[:, 1:, :] |= frontier[:, :-1, :]
+        next_frontier[:, :-1, :] |= frontier[:, 1:, :]
+        next_frontier[:, :, 1:] |= frontier[:, :, :-1]
+        next_frontier[:, :, :-1] |= frontier[:, :, 1:]
+        frontier = next_frontier & free & (distances < 0)
+    return distances
 
 class Policy(ABC):
     """Contain ``Action``s associated to indices of ``State``s."""
@@ -13,11 +41,42 @@ class Policy(ABC):
     def get_action(self, index: int) -> Action:
         """Return the ``Action`` associated with ``index``."""
         return Action(self._arr[index])
+
+    def get_actions(self, indices: np.ndarray | slice) -> np.ndarray:
+        """Return the values of the ``Action``s associated with ``indices``."""
+        return np.frombuffer(self._arr, dtype=np.uint8)[indices]
     
     def set_action(self, index: int, action: Action) -> None:
         """Associate the ``action`` to ``index``."""
         self._arr[index] = action.value
 
+    def set_actions(self, indices: np.ndarray | slice, actions: np.ndarray) -> None:
+        """Associate the values in ``actions`` to ``indices``."""
+        np.frombuffer(self._arr, dtype=np.uint8)[indices] = actions
+
+    def fill_with_shortest_paths(self, valid_state_space: ValidStateSpace) -> None:
+        """Associate to each valid ``State`` the ``Action`` moving the agent along a shortest path to the target.
+
+        The paths avoid obstacles but ignore the opponent. Ties are broken in favour of the ``Action`` that comes first,
+        and ``Action.UP`` is used where the target can't be reached.
+        It gives the policy iteration algorithm a starting ``Policy`` closer to the optimal one than a constant ``Policy``.
+        """
+        distances: np.ndarray = _get_distances(valid_state_space.get_occupied_cells())
+        N: int = valid_state_space.map_size.N
+        M: int = valid_state_space.map_size.M
+        agent_x, agent_y, _, _, target_x, target_y = valid_state_space.get_positions_arrays()
+        target_cells: np.ndarray = target_x + target_y * N
+        actions_distances: np.ndarray = np.full((valid_state_space.space_size, Action.MAX_EXCLUSIVE), np.inf)
+        for action in range(Action.MAX_EXCLUSIVE):
+            offset: Vec2D = Vec2D()
+            offset.move(Action(action))
+            next_x: np.ndarray = agent_x + offset.x
+            next_y: np.ndarray = agent_y + offset.y
+            is_within_bounds: np.ndarray = (next_x > -1) & (next_x < N) & (next_y > -1) & (next_y < M)
+            next_distances: np.ndarray = distances[target_cells[is_within_bounds], next_y[is_within_bounds], next_x[is_within_bounds]]
+            actions_distances[is_within_bounds, action] = np.where(next_distances < 0, np.inf, next_distances)
+        self.set_actions(slice(None), np.argmin(actions_distances, axis=1))
+
     def write_to_file(self, policy_file_name: str) -> None:
         """Write the ``Policy`` as a binary file in the path specified by ``policy_file_name``."""
         with open(policy_file_name, "wb") as f:
@@ -39,9 +98,7 @@ class PolicySequential(Policy):
         p._arr = array("B")
         try:
             with open(policy_file_name, "rb") as f:
-                policy_size: int = f.seek(0, 2)
-                f.seek(0, 0)
-                p._arr.fromfile(f, policy_size)
+                p._arr.frombytes(f.read())
         except FileNotFoundError:
             raise ValueError(f"Could not load the policy file: {policy_file_name}.\n"
                              "It did not exist.")
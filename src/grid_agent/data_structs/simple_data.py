@@ -1,9 +1,10 @@
-from ctypes import c_ubyte, c_ushort, c_ulong, c_ulonglong, c_float, c_double
+from ctypes import c_ubyte, c_ushort, c_uint, c_ulonglong, c_float, c_double
 from dataclasses import dataclass, field
 from enum import IntEnum
 from typing import Self
+import numpy as np
 
-type c_uints = c_ubyte | c_ushort | c_ulong | c_ulonglong
+type c_uints = c_ubyte | c_ushort | c_uint | c_ulonglong
 type c_uint_types = type[c_uints]
 type c_floats = c_float | c_double
 type c_float_types = type[c_floats]
@@ -21,7 +22,12 @@ class Action(IntEnum):
       ``[Action(i) for i in range(Action.MAX_EXCLUSIVE)]``
     """
 
-@dataclass
+_X_OFFSETS: tuple[int, ...] = (0, 1, 0, -1)
+"""Change of the x coordinate caused by each ``Action``, indexed by the ``Action`` value."""
+_Y_OFFSETS: tuple[int, ...] = (1, 0, -1, 0)
+"""Change of the y coordinate caused by each ``Action``, indexed by the ``Action`` value."""
+
+@dataclass(slots=True)
 class Vec2D:
     """A two-dimensional vector of integers."""
     x : int = 0
@@ -34,30 +40,16 @@ class Vec2D:
 
     def move(self, action: Action) -> None:
         """Change the values of the ``Vec2D`` based on ``action``."""
-        match action:
-            case Action.UP:
-                self.y += 1
-            case Action.RIGHT:
-                self.x += 1
-            case Action.DOWN:
-                self.y -= 1
-            case Action.LEFT:
-                self.x -= 1
+        self.x += _X_OFFSETS[action]
+        self.y += _Y_OFFSETS[action]
     
     def undo(self, action: Action) -> None:
         """Change the values of the ``Vec2D`` to undo ``action``.
         
         If the ``Vec2D`` was (2,1) passing ``Action.UP`` would change it to (1,1).
         """
-        match action:
-            case Action.UP:
-                self.y -= 1
-            case Action.RIGHT:
-                self.x -= 1
-            case Action.DOWN:
-                self.y += 1
-            case Action.LEFT:
-                self.x += 1
+        self.x -= _X_OFFSETS[action]
+        self.y -= _Y_OFFSETS[action]
 
 @dataclass
 class Obstacle:
@@ -74,14 +66,24 @@ class Obstacle:
 
     def is_inside(self, pos: Vec2D) -> bool:
         """Return ``True`` if ``pos`` is colliding with the ``Obstacle``."""
-        return (pos.x >= self.origin.x and pos.x < self.origin.x + self.extent.x and
-                pos.y >= self.origin.y and pos.y < self.origin.y + self.extent.y)
+        origin: Vec2D = self.origin
+        extent: Vec2D = self.extent
+        return (origin.x <= pos.x < origin.x + extent.x and
+                origin.y <= pos.y < origin.y + extent.y)
     
     def to_pos(self) -> list[Vec2D]:
         """Return a list of ``Vec2D`` containing the points occupied by the ``Obstacle``."""
-        return [Vec2D(x, y)
-                for x in range(self.origin.x, self.origin.x + self.extent.x)
-                for y in range(self.origin.y, self.origin.y + self.extent.y)]
+        xs, ys = self.to_pos_arrays()
+        return [Vec2D(x, y) for x, y in zip(xs.tolist(), ys.tolist())]
+
+    def to_pos_arrays(self) -> tuple[np.ndarray, np.ndarray]:
+        """Return the x and y coordinates of the points occupied by the ``Obstacle``, as two ``int32`` arrays.
+        
+        The points are in the same order as the ones returned by ``to_pos``.
+        """
+        xs, ys = np.mgrid[self.origin.x:self.origin.x + self.extent.x,
+                          self.origin.y:self.origin.y + self.extent.y].astype(np.int32)
+        return xs.ravel(), ys.ravel()
     
     def is_inside_bounds(self, map_size: Vec2D) -> bool:
         """Return ``True`` if the ``Obstacle`` is inside the bounds defined by the ``map_size``.
@@ -92,33 +94,33 @@ class Obstacle:
         return (self.origin.x > -1 and self.origin.x + self.extent.x <= map_size.x and
                 self.origin.y > -1 and self.origin.y + self.extent.y <= map_size.y)
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class MapSize:
     """A simple object storing useful values.
     
     The values are just products and exponetiation of the width and height of the map.
     """
     N: int
-    N2: int
-    N3: int
     M: int
-    M2: int
-    M3: int
-    NM: int
-    N2M: int
-    N2M2: int
-    N3M2: int
-    N3M3: int
+    N2: int = field(init=False)
+    N3: int = field(init=False)
+    M2: int = field(init=False)
+    M3: int = field(init=False)
+    NM: int = field(init=False)
+    N2M: int = field(init=False)
+    N2M2: int = field(init=False)
+    N3M2: int = field(init=False)
+    N3M3: int = field(init=False)
 
-    def __init__(self, N: int, M: int) -> None:
-        self.N = N
-        self.N2 = N * N
-        self.N3 = self.N2 * N
-        self.M = M
-        self.M2 = M * M
-        self.M2 = self.M2 * M
-        self.NM = N * M
-        self.N2M = self.NM * N
-        self.N2M2 = self.N2M * M
-        self.N3M2 = self.N2M2 * N
-        self.N3M3 = self.N3M2 * M
\ No newline at end of file
+    def __post_init__(self) -> None:
+        N: int = self.N
+        M: int = self.M
+        object.__setattr__(self, "N2", N * N)
+        object.__setattr__(self, "N3", self.N2 * N)
+        object.__setattr__(self, "M2", M * M)
+        object.__setattr__(self, "M3", self.M2 * M)
+        object.__setattr__(self, "NM", N * M)
+        object.__setattr__(self, "N2M", self.N2 * M)
+        object.__setattr__(self, "N2M2", self.N2 * self.M2)
+        object.__setattr__(self, "N3M2", self.N2M2 * N)
+        object.__setattr__(self, "N3M3", self.N3M2 * M)
@@ -1,8 +1,35 @@
 from grid_agent.data_structs.simple_data import Vec2D, MapSize, Action
 from dataclasses import dataclass, field
 from typing import Self
+import numpy as np
 
-@dataclass
+type PositionsArrays = tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]
+"""The coordinates of many ``State``s as six arrays: agent x and y, opponent x and y, target x and y."""
+
+def positions_to_indices(positions: PositionsArrays, map_size: MapSize) -> np.ndarray:
+    """Return the indices of the ``State``s whose coordinates are ``positions``.
+    
+    It is the vectorized counterpart of ``State.to_index``.
+    """
+    agent_x, agent_y, opponent_x, opponent_y, target_x, target_y = positions
+    return (agent_x + agent_y * map_size.N +
+            opponent_x * map_size.NM + opponent_y * map_size.N2M +
+            target_x * map_size.N2M2 + target_y * map_size.N3M2)
+
+def indices_to_positions(indices: np.ndarray, map_size: MapSize) -> PositionsArrays:
+    """Return the coordinates of the ``State``s associated with ``indices``.
+    
+    It is the vectorized counterpart of ``State.from_index``.
+    """
+    quotients: np.ndarray = indices.astype(np.int64)
+    quotients, agent_x = np.divmod(quotients, map_size.N)
+    quotients, agent_y = np.divmod(quotients, map_size.M)
+    quotients, opponent_x = np.divmod(quotients, map_size.N)
+    quotients, opponent_y = np.divmod(quotients, map_size.M)
+    target_y, target_x = np.divmod(quotients, map_size.N)
+    return (agent_x, agent_y, opponent_x, opponent_y, target_x, target_y)
+
+@dataclass(slots=True)
 class State:
     """Represent the state as a triplet of agent position, opponent position and target position."""
     agent_pos : Vec2D = field(default_factory=lambda: Vec2D())
@@ -18,9 +45,12 @@ class State:
           If the ``State`` is invalid, due to negative positions or out of bounds positions,
           the returned index will most likely be shared with a valid ``State``.
         """
-        return (self.agent_pos.x + self.agent_pos.y * map_size.N +
-                self.opponent_pos.x * map_size.NM + self.opponent_pos.y * map_size.N2M +
-                self.target_pos.x *map_size.N2M2 + self.target_pos.y * map_size.N3M2)
+        agent_pos: Vec2D = self.agent_pos
+        opponent_pos: Vec2D = self.opponent_pos
+        target_pos: Vec2D = self.target_pos
+        return (agent_pos.x + agent_pos.y * map_size.N +
+                opponent_pos.x * map_size.NM + opponent_pos.y * map_size.N2M +
+                target_pos.x * map_size.N2M2 + target_pos.y * map_size.N3M2)
 
     def from_index(self, index: int, map_size: MapSize) -> None:
         """Copy into the ``State`` the positions of the valid ``State`` associated with ``index``.
@@ -28,12 +58,13 @@ class State:
         WARNING
           It is assumed that ``index`` is valid relative to ``map_size``.
         """
-        self.agent_pos.x = index % map_size.N
-        self.agent_pos.y = (index % map_size.NM) // map_size.N
-        self.opponent_pos.x = (index % map_size.N2M) // map_size.NM
-        self.opponent_pos.y = (index % map_size.N2M2) // map_size.N2M
-        self.target_pos.x = (index % map_size.N3M2) // map_size.N2M2
-        self.target_pos.y = index // map_size.N3M2
+        N: int = map_size.N
+        M: int = map_size.M
+        index, self.agent_pos.x = divmod(index, N)
+        index, self.agent_pos.y = divmod(index, M)
+        index, self.opponent_pos.x = divmod(index, N)
+        index, self.opponent_pos.y = divmod(index, M)
+        self.target_pos.y, self.target_pos.x = divmod(index, N)
 
     def next_state(self, map_size: MapSize) -> bool:
         """Change the ``State`` to the next valid ``State`` according to ``map_size``.
@@ -56,16 +87,7 @@ class State:
           It is assumed that ``pos`` is contained by the ``State`` on which the method is called.
         """
         pos.move(action)
-        is_within_bounds: bool
-        match action:
-            case Action.UP:
-                is_within_bounds = pos.y < map_size.M
-            case Action.RIGHT:
-                is_within_bounds = pos.x < map_size.N
-            case Action.DOWN:
-                is_within_bounds = pos.y > -1
-            case Action.LEFT:
-                is_within_bounds = pos.x > -1
+        is_within_bounds: bool = -1 < pos.x < map_size.N and -1 < pos.y < map_size.M
         if not is_within_bounds:
             pos.undo(action)
         return is_within_bounds
@@ -90,6 +112,21 @@ class State:
     
     def copy(self, oth: Self) -> None:
         """Copy the positions of the passed ``State`` into itself."""
-        self.agent_pos.copy(oth.agent_pos)
-        self.target_pos.copy(oth.target_pos)
-        self.opponent_pos.copy(oth.opponent_pos)
\ No newline at end of file
+        agent_pos: Vec2D = self.agent_pos
+        opponent_pos: Vec2D = self.opponent_pos
+        target_pos: Vec2D = self.target_pos
+        oth_agent_pos: Vec2D = oth.agent_pos
+        oth_opponent_pos: Vec2D = oth.opponent_pos
+        oth_target_pos: Vec2D = oth.target_pos
+        agent_pos.x = oth_agent_pos.x
+        agent_pos.y = oth_agent_pos.y
+        opponent_pos.x = oth_opponent_pos.x
+        opponent_pos.y = oth_opponent_pos.y
+        target_pos.x = oth_target_pos.x
+        target_pos.y = oth_target_pos.y
+
+    def clone(self) -> "State":
+        """Return a new ``State`` with the same positions, not sharing any ``Vec2D`` with this one."""
+        return State(Vec2D(self.agent_pos.x, self.agent_pos.y),
+                     Vec2D(self.opponent_pos.x, self.opponent_pos.y),
+                     Vec2D(self.target_pos.x, self.target_pos.y))
\ No newline at end of file
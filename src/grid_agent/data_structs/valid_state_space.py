@@ -1,39 +1,43 @@
-from grid_agent.data_structs.simple_data import Vec2D, MapSize, Obstacle, c_uint_types
-from grid_agent.data_structs.state import State
+from grid_agent.data_structs.simple_data import Vec2D, MapSize, Obstacle, c_uints, c_uint_types
+from grid_agent.data_structs.state import State, PositionsArrays, indices_to_positions
 
-from collections.abc import Iterable, Sequence
+from collections.abc import Iterable
 from collections import OrderedDict
+from bisect import bisect_left
 
-from ctypes import c_ubyte, c_ushort, c_ulong, c_ulonglong
-from typing import Protocol, overload, override
+from ctypes import c_ubyte, c_ushort, c_uint, c_ulonglong, Array
+from typing import Any, override
 from abc import ABC, abstractmethod
 import multiprocessing as mp
-from array import array
+import numpy as np
 
-class ValidStateSpaceArray(Protocol):
-    """Protocol for the container used by ``ValidStateSpace``."""
-    @overload
-    def __getitem__(self, index: int) -> int:
-        ...
-    
-    @overload
-    def __getitem__(self, slice: slice) -> Sequence[int]:
-        ...
+type uint_dtypes = type[np.uint8] | type[np.uint16] | type[np.uint32] | type[np.uint64]
+type ValidStateSpaceBuffer = np.ndarray | Array[c_uints]
+
+_UINT_TYPES: tuple[tuple[int, uint_dtypes, c_uint_types], ...] = (
+    (2 ** 8, np.uint8, c_ubyte),
+    (2 ** 16, np.uint16, c_ushort),
+    (2 ** 32, np.uint32, c_uint),
+    (2 ** 64, np.uint64, c_ulonglong)
+)
+"""The unsigned integer types, as NumPy and ctypes types, preceded by the number of values they can represent."""
 
 class ValidStateSpaceIterator:
     """Iterator for ``ValidStateSpace``."""
-    def __init__(self, states_indices: ValidStateSpaceArray, space_size: int, map_size: MapSize, reversed: bool) -> None:
+    __slots__ = ("__array", "__map_size", "__current_index", "__end_index", "__step", "__state")
+
+    def __init__(self, states_indices: np.ndarray, space_size: int, map_size: MapSize, reversed: bool) -> None:
         """Make an iterator for ``states_indices`` of size ``space_size``.
         
         ``map_size`` is needed for converting indices back to ``State``s.
 
         If ``reversed`` is ``True`` the order of iteration is reversed.
         """
-        self.__array: ValidStateSpaceArray = states_indices
-        self.__space_size: int = space_size
+        self.__array: np.ndarray = states_indices
         self.__map_size: MapSize = map_size
-        self.__reversed: bool = reversed
         self.__current_index: int = space_size - 1 if reversed else 0
+        self.__end_index: int = -1 if reversed else space_size
+        self.__step: int = -1 if reversed else 1
         self.__state: State = State()
 
     def __iter__(self) -> "ValidStateSpaceIterator":
@@ -44,11 +48,11 @@ class ValidStateSpaceIterator:
         
         Throw ``StopIteration`` if the iteration is finished.
         """
-        if (self.__current_index == self.__space_size or
-            self.__current_index == -1):
+        current_index: int = self.__current_index
+        if current_index == self.__end_index:
             raise StopIteration()
-        self.__state.from_index(self.__array[self.__current_index], self.__map_size)
-        self.__current_index = self.__current_index - 1 if self.__reversed else self.__current_index + 1
+        self.__state.from_index(self.__array.item(current_index), self.__map_size)
+        self.__current_index = current_index + self.__step
         return self.__state
 
 class ValidStateSpace(ABC):
@@ -58,23 +62,75 @@ class ValidStateSpace(ABC):
         self.map_size: MapSize = MapSize(map_size.x, map_size.y)
         self.space_size: int = 0
         self.__valid_cache: OrderedDict[int, int] = OrderedDict()
-        self.__not_valid_cache: OrderedDict[int, int] = OrderedDict()
         self.__max_cache_length: int = 3 * map_size.x
-        index_list: list[int] = []
-        state: State = State()
-        state_index: int = 0
-        while state.next_state(self.map_size):
-            state_index += 1
-            if self.__is_state_valid(state, obstacles):
-                index_list.append(state_index)
-                self.space_size += 1
-        types: tuple[str, c_uint_types] = self.__select_type(self.space_size)
+        obstacles_mask: np.ndarray = self.__get_obstacles_mask(obstacles)
+        self.__occupied_cells: list[bool] = obstacles_mask.ravel().tolist()
+        types: tuple[uint_dtypes, c_uint_types] = self.__select_type(self.map_size.N3M3)
         self.type: c_uint_types = types[1]
-        self.__array: ValidStateSpaceArray = self._get_collection(index_list, types)
+        self.__dtype: uint_dtypes = types[0]
+        self.__buffer: ValidStateSpaceBuffer = self.__make_valid_indices(obstacles_mask, types)
+        self.__make_array()
+
+    def __make_array(self) -> None:
+        """Make the NumPy array, over the storage of the indices of valid ``State``s, used by the methods."""
+        self.__array: np.ndarray = np.frombuffer(self.__buffer, dtype=self.__dtype)
+
+    def __getstate__(self) -> dict[str, Any]:
+        """Return the state to pickle, without the NumPy array which would be pickled as a copy."""
+        state: dict[str, Any] = self.__dict__.copy()
+        del state["_ValidStateSpace__array"]
+        return state
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        """Restore the pickled state and rebuild the NumPy array."""
+        self.__dict__.update(state)
+        self.__make_array()
+
+    def __make_valid_indices(self, obstacles_mask: np.ndarray, types: tuple[uint_dtypes, c_uint_types]) -> ValidStateSpaceBuffer:
+        """Return the container filled with the sorted indices of the valid ``State``s, given the ``obstacles_mask`` of the occupied cells.
+        
+        The indices of the valid pairs of agent and opponent positions are computed once,
+        then each free target position selects the pairs whose opponent isn't on it and offsets them.
+        The number of valid ``State``s is known in advance, so the indices are written directly into the container
+        and no mask as large as the whole ``State`` space is ever allocated.
+        """
+        NM: int = self.map_size.NM
+        N2M2: int = self.map_size.N2M2
+        free: np.ndarray = ~obstacles_mask.ravel()
+        free_cells: np.ndarray = np.flatnonzero(free)
+        pairs: np.ndarray = np.flatnonzero(free[:, np.newaxis] & free[np.newaxis, :])
+        opponent_cells: np.ndarray = pairs // NM
+        pairs_per_opponent_cell: np.ndarray = np.bincount(opponent_cells, minlength=NM)
+        self.space_size = len(free_cells) * len(pairs) - int(pairs_per_opponent_cell[free_cells].sum())
+        buffer: ValidStateSpaceBuffer = self._get_collection(self.space_size, types)
+        indices: np.ndarray = np.frombuffer(buffer, dtype=types[0])
+        pairs = pairs.astype(types[0])
+        start: int = 0
+        for target_cell in free_cells.tolist():
+            target_pairs: np.ndarray = pairs[opponent_cells != target_cell]
+            end: int = start + len(target_pairs)
+            np.add(target_pairs, target_cell * N2M2, out=indices[start:end])
+            start = end
+        return buffer
+
+    def __get_obstacles_mask(self, obstacles: Iterable[Obstacle]) -> np.ndarray:
+        """Return a boolean mask, of shape (M, N), which is ``True`` on the cells occupied by ``obstacles``."""
+        obstacles = list(obstacles)
+        x0: np.ndarray = np.array([obstacle.origin.x for obstacle in obstacles], dtype=np.int64)
+        y0: np.ndarray = np.array([obstacle.origin.y for obstacle in obstacles], dtype=np.int64)
+        x1: np.ndarray = x0 + np.array([obstacle.extent.x for obstacle in obstacles], dtype=np.int64)
+        y1: np.ndarray = y0 + np.array([obstacle.extent.y for obstacle in obstacles], dtype=np.int64)
+        y, x = np.ogrid[0:self.map_size.M, 0:self.map_size.N]
+        x = x[..., np.newaxis]
+        y = y[..., np.newaxis]
+        return ((x >= x0) & (x < x1) & (y >= y0) & (y < y1)).any(axis=-1)
 
     @abstractmethod
-    def _get_collection(self, indices: list[int], types: tuple[str, c_uint_types]) -> ValidStateSpaceArray:
-        """Return the container that ``ValidStateSpace`` will use to store the indices of valid ``State``s."""
+    def _get_collection(self, size: int, types: tuple[uint_dtypes, c_uint_types]) -> ValidStateSpaceBuffer:
+        """Return the container, of length ``size``, that ``ValidStateSpace`` will use to store the indices of valid ``State``s.
+        
+        ``types`` contains the NumPy and ctypes types of the elements of the container.
+        """
         ...
 
     def get_valid_index(self, state: State) -> int:
@@ -92,6 +148,7 @@ class ValidStateSpace(ABC):
         state_index: int = state.to_index(self.map_size)
         valid_index: int | None = self.__valid_cache.get(state_index)
         if valid_index is not None:
+            self.__valid_cache.move_to_end(state_index)
             return valid_index
         is_valid: bool
         is_valid, valid_index = self.__binary_search(state_index)
@@ -100,98 +157,83 @@ class ValidStateSpace(ABC):
         self.__add_to_valid_cache(state_index, valid_index)
         return valid_index
     
+    def get_valid_indices(self, states_indices: np.ndarray) -> np.ndarray:
+        """Return the valid indices of the ``State``s whose indices are ``states_indices``.
+        
+        It is the bulk counterpart of ``get_valid_index``: the result has the shape of ``states_indices``
+        and contains -1 where the ``State`` is not valid. The cache of ``get_valid_index`` is not used.
+
+        WARNING
+          It doesn't check if the indices come from positions out of bounds.
+        """
+        if self.space_size == 0:
+            return np.full(np.shape(states_indices), -1, dtype=np.int64)
+        valid_indices: np.ndarray = np.searchsorted(self.__array, states_indices)
+        is_valid: np.ndarray = self.__array[np.minimum(valid_indices, self.space_size - 1)] == states_indices
+        is_valid &= valid_indices < self.space_size
+        return np.where(is_valid, valid_indices, -1)
+
     def is_state_outside_obstacles(self, state: State) -> bool:
         """Return ``True`` if ``state`` doesn't contain any positions in collision with obstacles.
         
+        The positions are looked up in the grid of the cells occupied by obstacles,
+        so no search among the indices of valid ``State``s is needed.
+
         WARNING
           It doesn't check if the positions of ``state`` are out of bounds.
         
           Use ``is_state_within_bounds`` method if not sure.
         """
-        state_index: int = state.to_index(self.map_size)
-        if state_index in self.__valid_cache:
-            return True
-        if state_index in self.__not_valid_cache:
-            return False
-        is_valid: bool
-        valid_index: int
-        is_valid, valid_index = self.__binary_search(state_index)
-        if is_valid:
-            self.__add_to_valid_cache(state_index, valid_index)
-        else:
-            self.__add_to_not_valid_cache(state_index, valid_index)
-        return is_valid
+        occupied_cells: list[bool] = self.__occupied_cells
+        N: int = self.map_size.N
+        agent_pos: Vec2D = state.agent_pos
+        opponent_pos: Vec2D = state.opponent_pos
+        target_pos: Vec2D = state.target_pos
+        return not (occupied_cells[agent_pos.x + agent_pos.y * N] or
+                    occupied_cells[opponent_pos.x + opponent_pos.y * N] or
+                    occupied_cells[target_pos.x + target_pos.y * N] or
+                    (target_pos.x == opponent_pos.x and target_pos.y == opponent_pos.y))
 
     def __add_to_valid_cache(self, state_index: int, valid_state_index: int) -> None:
         """Add to the cache of indices of valid ``State``s ``state_index`` associated with ``valid_state_index``."""
+        self.__load_near_states_to_cache(valid_state_index)
         self.__valid_cache[state_index] = valid_state_index
-        self.__load_near_states_to_cache(state_index, valid_state_index, True)
-        if len(self.__valid_cache) == self.__max_cache_length:
+        while len(self.__valid_cache) > self.__max_cache_length:
             self.__valid_cache.popitem(last=False)
 
-    def __add_to_not_valid_cache(self, state_index: int, last_smaller_valid_index: int) -> None:
-        """Add to the cache of indices of not valid ``State``s ``state_index`` associated with ``last_smaller_valid_index``."""
-        self.__not_valid_cache[state_index] = last_smaller_valid_index
-        self.__load_near_states_to_cache(state_index, last_smaller_valid_index, False)
-        if len(self.__not_valid_cache) == self.__max_cache_length:
-            self.__not_valid_cache.popitem(last=False)
-
-    def __load_near_states_to_cache(self, state_index: int, valid_state_index: int, is_state_valid: bool) -> None:
-        """Add into the caches the indices of the states near the state of index ``state_index``.
-        
-        ``is_state_valid`` is ``bool`` signalling if ``state_index`` was put into the cache of indices
-        of valid states or into the cache of indices of not valid states.
-
-        ``valid_state_index`` is the valid index associated with ``state_index`` if ``is_state_valid`` is ``True``
-        otherwise is the index of the last smaller index of a valid ``State`` respect to ``state_index``. 
-        """
-        prev_valid_state_index: int = valid_state_index - 1 if is_state_valid else valid_state_index
-        prev_state_index: int = state_index - 1
+    def __load_near_states_to_cache(self, valid_state_index: int) -> None:
+        """Add into the cache the indices of the valid ``State``s found next to ``valid_state_index``."""
+        prev_valid_state_index: int = valid_state_index - 1
         next_valid_state_index: int = valid_state_index + 1
-        next_state_index: int = state_index + 1
-        
         if prev_valid_state_index > -1:
-            prev_state_index_found: int = self.__array[prev_valid_state_index]
-            if prev_state_index_found == prev_state_index:
-                self.__valid_cache[prev_state_index] = prev_valid_state_index
-            else:
-                self.__valid_cache[prev_state_index_found] = prev_valid_state_index
-                self.__not_valid_cache[prev_state_index_found + 1] = prev_valid_state_index
-                self.__not_valid_cache[prev_state_index] = prev_valid_state_index
-        else:
-            self.__not_valid_cache[prev_state_index] = prev_valid_state_index
-        
+            self.__valid_cache[self.__array.item(prev_valid_state_index)] = prev_valid_state_index
         if next_valid_state_index < self.space_size:
-            next_state_index_found: int = self.__array[next_valid_state_index]
-            if next_state_index_found == next_state_index:
-                self.__valid_cache[next_state_index] = next_valid_state_index
-            else:
-                self.__valid_cache[next_state_index_found] = next_valid_state_index
-                self.__not_valid_cache[next_state_index_found - 1] = valid_state_index
-                self.__not_valid_cache[next_state_index] = valid_state_index
-        else:
-            self.__not_valid_cache[next_state_index] = valid_state_index
-        
-        while len(self.__valid_cache) > self.__max_cache_length:
-            self.__valid_cache.popitem(last=False)
-        while len(self.__not_valid_cache) > self.__max_cache_length:
-            self.__not_valid_cache.popitem(last=False)
+            self.__valid_cache[self.__array.item(next_valid_state_index)] = next_valid_state_index
 
     def copy_valid_state_to(self, state: State, index: int) -> None:
         """Copy into ``state`` the ``State`` found at ``index``."""
-        state.from_index(self.__array[index], self.map_size)
-
-    def __select_type(self, number_of_states: int) -> tuple[str, c_uint_types]:
-        """Select the smallest type of unsigned integer able to index ``number_of_states``."""
-        match number_of_states:
-            case n if n <= 2 ** 8:
-                return ("B",  c_ubyte)
-            case n if n <= 2 ** 16:
-                return ("H", c_ushort)
-            case n if n <= 2 ** 32:
-                return ("L", c_ulong)
-            case _:
-                return ("Q", c_ulonglong)
+        state.from_index(self.__array.item(index), self.map_size)
+
+    def get_positions_arrays(self, start: int = 0, end: int | None = None) -> PositionsArrays:
+        """Return the coordinates of the ``State``s found at the indices in [``start``, ``end``).
+        
+        It is the bulk counterpart of ``copy_valid_state_to``.
+        """
+        return indices_to_positions(self.__array[start:end], self.map_size)
+
+    def get_occupied_cells(self) -> np.ndarray:
+        """Return a boolean mask, of shape (M, N), which is ``True`` on the cells occupied by obstacles."""
+        return np.array(self.__occupied_cells, dtype=np.bool_).reshape(self.map_size.M, self.map_size.N)
+
+    def __select_type(self, number_of_states: int) -> tuple[uint_dtypes, c_uint_types]:
+        """Select the smallest type of unsigned integer able to index ``number_of_states``.
+        
+        Return the NumPy type and the corresponding ctypes type.
+        """
+        for values_number, dtype, ctype in _UINT_TYPES:
+            if number_of_states <= values_number:
+                return (dtype, ctype)
+        raise ValueError(f"There are too many states to be indexed: {number_of_states}.")
     
     def __binary_search(self, state_index: int) -> tuple[bool, int]:
         """Perform a binary search into the indices of valid ``State``s.
@@ -201,40 +243,21 @@ class ValidStateSpace(ABC):
 
           ``False`` and the valid index of the last valid ``State`` whose index is smaller than ``state_index``.
         """
-        i: int = 0
-        j: int = self.space_size - 1
-        while i <= j:
-            k: int = (i + j) // 2
-            retrieved_index: int = self.__array[k]
-            if retrieved_index == state_index:
-                return (True, k)
-            elif retrieved_index < state_index:
-                i = k + 1
-            else:
-                j = k - 1
-        return (False, j)
-
-    def __is_state_valid(self, state: State, obstacles: Iterable[Obstacle]) -> bool:
-        """Return ``True`` if ``state`` is valid, given ``obstacles``."""
-        if state.target_pos == state.opponent_pos:
-            return False
-        for obstacle in obstacles:
-            if (obstacle.is_inside(state.agent_pos) or
-                obstacle.is_inside(state.opponent_pos) or
-                obstacle.is_inside(state.target_pos)):
-                return False
-        return True
-    
+        k: int = bisect_left(self.__array, state_index, hi=self.space_size)
+        if k < self.space_size and self.__array.item(k) == state_index:
+            return (True, k)
+        return (False, k - 1)
+
     def is_state_within_bounds(self, state: State) -> bool:
         """Return ``True`` if ``state`` is within the bounds contained by ``ValidStateSpace``."""
-        return (self.__is_pos_within_bounds(state.agent_pos) and
-                self.__is_pos_within_bounds(state.opponent_pos) and
-                self.__is_pos_within_bounds(state.target_pos))
-
-    def __is_pos_within_bounds(self, pos: Vec2D) -> bool:
-        """Return ``True`` if ``pos`` is within the bounds contained by ``ValidStateSpace``."""
-        return (pos.x > -1 and pos.x < self.map_size.N and
-                pos.y > -1 and pos.y < self.map_size.M)
+        N: int = self.map_size.N
+        M: int = self.map_size.M
+        agent_pos: Vec2D = state.agent_pos
+        opponent_pos: Vec2D = state.opponent_pos
+        target_pos: Vec2D = state.target_pos
+        return (-1 < agent_pos.x < N and -1 < agent_pos.y < M and
+                -1 < opponent_pos.x < N and -1 < opponent_pos.y < M and
+                -1 < target_pos.x < N and -1 < target_pos.y < M)
 
     def __iter__(self) -> ValidStateSpaceIterator:
         """Return an iterator of ``ValidStateSpace``."""
@@ -248,22 +271,29 @@ class ValidStateSpace(ABC):
         """Return the length of ``ValidStateSpace``."""
         return self.space_size
     
-    def __getitem__(self, index: int | slice) -> State | Sequence[State]:
-        """Return the ``State``(or a ``Sequence`` of ``State``) associated with ``index``(or indices)."""
-        state_indices: int | Sequence[int] = self.__array[index]
-        if isinstance(state_indices, int):
+    def __getitem__(self, index: int | slice) -> State | PositionsArrays:
+        """Return the ``State`` associated with ``index``.
+        
+        If ``index`` is a ``slice`` return instead the coordinates of the ``State``s associated with the indices,
+        as ``PositionsArrays``.
+        """
+        if isinstance(index, int):
             state: State = State()
-            state.from_index(state_indices, self.map_size)
+            state.from_index(self.__array.item(index), self.map_size)
             return state
-        states: list[State] = [State() for _ in state_indices]
-        for state, index in zip(states, state_indices):
-            state.from_index(index, self.map_size)
-        return states
+        return indices_to_positions(self.__array[index], self.map_size)
+
+    def contains_index(self, state_index: int) -> bool:
+        """Return ``True`` if ``state_index`` is the index of a valid ``State``.
+        
+        Unlike the ``in`` operator it doesn't dispatch on the type of its argument.
+        """
+        return state_index in self.__valid_cache or self.__binary_search(state_index)[0]
 
     def __contains__(self, obj: int | State) -> bool:
         """Return ``True`` if ``obs`` is a valid ``State`` or the index of a valid ``State``."""
         if isinstance(obj, int):
-            return self.__binary_search(obj)[0]
+            return self.contains_index(obj)
         if isinstance(obj, State):
             return self.is_state_within_bounds(obj) and self.is_state_outside_obstacles(obj)
         return False
@@ -271,11 +301,14 @@ class ValidStateSpace(ABC):
 class ValidStateSpaceSequential(ValidStateSpace):
     """``ValidStateSpace`` specialized for sequential learning."""
     @override
-    def _get_collection(self, indices: list[int], types: tuple[str, c_uint_types]) -> ValidStateSpaceArray:
-        return array(types[0], indices)
+    def _get_collection(self, size: int, types: tuple[uint_dtypes, c_uint_types]) -> ValidStateSpaceBuffer:
+        return np.empty(size, dtype=types[0])
 
 class ValidStateSpaceParallel(ValidStateSpace):
-    """``ValidStateSpace`` specialized for parallel learning."""
+    """``ValidStateSpace`` specialized for parallel learning.
+    
+    The indices of valid ``State``s are kept in shared memory, so the processes don't duplicate them.
+    """
     @override
-    def _get_collection(self, indices: list[int], types: tuple[str, c_uint_types]) -> ValidStateSpaceArray:
-        return mp.RawArray(types[1], indices)
\ No newline at end of file
+    def _get_collection(self, size: int, types: tuple[uint_dtypes, c_uint_types]) -> ValidStateSpaceBuffer:
+        return mp.RawArray(types[1], size)
\ No newline at end of file
@@ -1,92 +1,112 @@
 from grid_agent.data_structs.simple_data import c_floats, c_float_types
-from ctypes import c_bool, c_float, c_double, Array
-from typing import override
+from ctypes import c_float, c_double, Array
+from typing import Any, override
 from abc import ABC, abstractmethod
 import multiprocessing as mp
-from itertools import repeat
 from array import array
+import numpy as np
 
-class ValueFunctionsContainer(ABC):
-    """A container storing the value functions of the current and next policies."""
-    @abstractmethod
-    def get_type(self) -> c_float_types:
-        """Return the type of the values stored in the value functions."""
-        ...
+type ValueFunctionArray = array[float] | Array[c_floats]
 
-    @abstractmethod
-    def get_current_value(self, index: int) -> float:
-        """Return the value the current ``Policy`` associates with ``index``."""
-        ...
-
-    @abstractmethod
-    def set_next_value(self, index: int, value: float) -> None:
-        """Set the value the next ``Policy`` will associate with ``index``."""
-        ...
+class ValueFunctionsContainer(ABC):
+    """A container storing the value functions of the current and next policies.
 
-    @abstractmethod
-    def swap_value_functions(self) -> None:
-        """Swap the value functions in order to write on the previous one the values of the next."""
-        ...
+    Besides the per-index accessors it keeps NumPy views over the stored values,
+    used by the bulk operations.
 
-class ValueFunctionsContainerSequential(ValueFunctionsContainer):
-    """``ValueFunctionsContainer`` specialized for sequential learning."""
+    The swap only exchanges the references the container holds to the value functions,
+    so every process using the container has to call ``swap_value_functions`` between sweeps.
+    """
     def __init__(self, size: int, start_value: float = 0.0, use_double: bool = True) -> None:
         """Initialize the value functions with ``start_value`` and with the specified ``size`` .
-        
+
         If ``use_double`` is ``True`` the values will be stored as ``double``, otherwise as ``float``.
         """
         self.__type: c_float_types = c_double if use_double else c_float
-        type_char: str = "d" if use_double else "f"
-        self.__old_values: array[float] = array(type_char, repeat(start_value, size))
-        self.__new_values: array[float] = array(type_char, repeat(start_value, size))
+        self.__current_values: ValueFunctionArray = self._get_collection(size, start_value, self.__type)
+        self.__next_values: ValueFunctionArray = self._get_collection(size, start_value, self.__type)
+        self.__make_views()
+
+    @abstractmethod
+    def _get_collection(self, size: int, start_value: float, value_type: c_float_types) -> ValueFunctionArray:
+        """Return the container, of length ``size`` and filled with ``start_value``, used to store a value function."""
+        ...
+
+    def __make_views(self) -> None:
+        """Make the NumPy views over the value functions."""
+        dtype: type[np.floating] = np.float64 if self.__type is c_double else np.float32
+        self.__current_view: np.ndarray = np.frombuffer(self.__current_values, dtype=dtype)
+        self.__next_view: np.ndarray = np.frombuffer(self.__next_values, dtype=dtype)
+
+    def __getstate__(self) -> dict[str, Any]:
+        """Return the state to pickle, without the NumPy views which would be pickled as copies."""
+        state: dict[str, Any] = self.__dict__.copy()
+        del state["_ValueFunctionsContainer__current_view"]
+        del state["_ValueFunctionsContainer__next_view"]
+        return state
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        """Restore the pickled state and rebuild the NumPy views."""
+        self.__dict__.update(state)
+        self.__make_views()
 
-    @override
     def get_type(self) -> c_float_types:
+        """Return the type of the values stored in the value functions."""
         return self.__type
 
-    @override
+    def get_current_view(self) -> np.ndarray:
+        """Return a NumPy view over the values of the current ``Policy``.
+        
+        The view follows the storage, not the role: after ``swap_value_functions`` it must be requested again.
+        """
+        return self.__current_view
+
+    def get_next_view(self) -> np.ndarray:
+        """Return a NumPy view over the values of the next ``Policy``.
+        
+        Writing into it is equivalent to calling ``set_next_value``.
+        ``swap_value_functions`` still has to be called after the sweep, and the view must be requested again after it.
+        """
+        return self.__next_view
+
     def get_current_value(self, index: int) -> float:
-        return self.__old_values[index]
+        """Return the value the current ``Policy`` associates with ``index``."""
+        return self.__current_values[index]
 
-    @override
     def set_next_value(self, index: int, value: float) -> None:
-        self.__new_values[index] = value
+        """Set the value the next ``Policy`` will associate with ``index``."""
+        self.__next_values[index] = value
 
-    @override
-    def swap_value_functions(self) -> None:
-        self.__old_values, self.__new_values = self.__new_values, self.__old_values
+    def set_next_values(self, indices: np.ndarray | slice, values: np.ndarray) -> None:
+        """Set the values the next ``Policy`` will associate with ``indices``."""
+        self.__next_view[indices] = values
 
-class ValueFunctionsContainerParallel(ValueFunctionsContainer):
-    """``ValueFunctionsContainer`` specialized for parallel learning."""
-    def __init__(self, size: int, start_value: float = 0.0, use_double: bool = True) -> None:
-        """Initialize the value functions with ``start_value`` and with the specified ``size`` .
-        
-        If ``use_double`` is ``True`` the values will be stored as ``double``, otherwise as ``float``.
-        """
-        self.__type: c_float_types = c_double if use_double else c_float
-        values: list[float] = [value for value in repeat(start_value, size)]
-        self.__array_a: Array[c_floats] = mp.RawArray(self.__type, values)
-        self.__array_b: Array[c_floats] = mp.RawArray(self.__type, values)
-        self.__swapped: c_bool = mp.RawValue(c_bool, False)
+    def get_max_difference(self, start: int = 0, end: int | None = None) -> float:
+        """Return the maximum absolute difference between the next and current values of the indices in [``start``, ``end``)."""
+        next_values: np.ndarray = self.__next_view[start:end]
+        if next_values.size == 0:
+            return 0.0
+        return float(np.max(np.abs(np.subtract(next_values, self.__current_view[start:end], dtype=np.float64))))
 
-    @override
-    def get_type(self) -> c_float_types:
-        return self.__type
+    def get_next_values_sum(self, start: int = 0, end: int | None = None) -> float:
+        """Return the sum of the next values of the indices in [``start``, ``end``)."""
+        return float(np.sum(self.__next_view[start:end], dtype=np.float64))
 
+    def swap_value_functions(self) -> None:
+        """Swap the value functions in order to write on the previous one the values of the next."""
+        self.__current_values, self.__next_values = self.__next_values, self.__current_values
+        self.__current_view, self.__next_view = self.__next_view, self.__current_view
+
+class ValueFunctionsContainerSequential(ValueFunctionsContainer):
+    """``ValueFunctionsContainer`` specialized for sequential learning."""
     @override
-    def get_current_value(self, index: int) -> float:
-        if not self.__swapped.value:
-            return self.__array_a[index]
-        else:
-            return self.__array_b[index]
-        
-    @override
-    def set_next_value(self, index: int, value: float) -> None:
-        if not self.__swapped.value:
-            self.__array_b[index] = value
-        else:
-            self.__array_a[index] = value
-    
+    def _get_collection(self, size: int, start_value: float, value_type: c_float_types) -> ValueFunctionArray:
+        return array("d" if value_type is c_double else "f", [start_value]) * size
+
+class ValueFunctionsContainerParallel(ValueFunctionsContainer):
+    """``ValueFunctionsContainer`` specialized for parallel learning."""
     @override
-    def swap_value_functions(self) -> None:
-        self.__swapped.value = not self.__swapped.value
\ No newline at end of file
+    def _get_collection(self, size: int, start_value: float, value_type: c_float_types) -> ValueFunctionArray:
+        values: Array[c_floats] = mp.RawArray(value_type, size)
+        np.frombuffer(values, dtype=np.float64 if value_type is c_double else np.float32).fill(start_value)
+        return values
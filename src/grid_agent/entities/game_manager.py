@@ -1,12 +1,12 @@
 from grid_agent.data_structs.valid_state_space import ValidStateSpace
 from grid_agent.entities.moving_entity import MovingEntity
-from grid_agent.data_structs.simple_data import Action
+from grid_agent.data_structs.simple_data import Action, Vec2D
 from grid_agent.data_structs.state import State
 from grid_agent.configs.game_configs import GameConfigs
 
 from dataclasses import dataclass, field
 from collections.abc import Callable
-from copy import copy, deepcopy
+from copy import copy
 from enum import IntEnum
 
 @dataclass
@@ -24,6 +24,13 @@ class GameData:
     target_action: Action = Action.MAX_EXCLUSIVE
     opponent_action: Action = Action.MAX_EXCLUSIVE
 
+    def copy(self) -> "GameData":
+        """Return a shallow copy of the ``GameData``, sharing its ``State``.
+        
+        It is equivalent to ``copy.copy``, but it calls the constructor directly.
+        """
+        return GameData(self.state, self.agent_action, self.target_action, self.opponent_action)
+
 class Result(IntEnum):
     """Enum enumerating the possible states of the game."""
     FAIL = 0,
@@ -49,20 +56,28 @@ class GameManager:
         self.__res: Result = Result.WAITING_FOR_RESULT
         self.__gamedata: GameData = GameData()
         self.__callback: Callable[[GameData], None] = lambda g: None
+        self.__has_callback: bool = False
 
     def register_callback(self, callback: Callable[[GameData], None]) -> None:
         """Register the ``callback`` to call between each game iteration."""
         self.__callback = callback
+        self.__has_callback = True
 
     def start(self) -> Result:
-        """Start the game session."""
+        """Start the game session.
+        
+        The ``State`` and ``GameData`` of each frame are copied only if a callback was registered.
+        """
         while self.__res == Result.WAITING_FOR_RESULT:
-            self.__gamedata.state = deepcopy(self.__state)
+            if self.__has_callback:
+                self.__gamedata.state = self.__state.clone()
             self.__next_iteration()
-            self.__callback(copy(self.__gamedata))
+            if self.__has_callback:
+                self.__callback(self.__gamedata.copy())
         self.__gamedata = GameData()
-        self.__gamedata.state = deepcopy(self.__state)
-        self.__callback(copy(self.__gamedata))
+        if self.__has_callback:
+            self.__gamedata.state = self.__state.clone()
+            self.__callback(self.__gamedata.copy())
         return self.__res
 
     def __next_iteration(self) -> None:
@@ -76,12 +91,13 @@ class GameManager:
 
     def __check_for_result(self) -> bool:
         """Return ``True`` if the game session ended and set the result accordingly. Otherwise return ``False``."""
-        match self.__state.agent_pos:
-            case self.__state.target_pos:
-                self.__res = Result.SUCCESS
-                return True
-            case self.__state.opponent_pos:
-                self.__res = Result.FAIL
-                return True
-            case _:
-                return False
\ No newline at end of file
+        agent_pos: Vec2D = self.__state.agent_pos
+        target_pos: Vec2D = self.__state.target_pos
+        opponent_pos: Vec2D = self.__state.opponent_pos
+        if agent_pos.x == target_pos.x and agent_pos.y == target_pos.y:
+            self.__res = Result.SUCCESS
+            return True
+        if agent_pos.x == opponent_pos.x and agent_pos.y == opponent_pos.y:
+            self.__res = Result.FAIL
+            return True
+        return False
\ No newline at end of file
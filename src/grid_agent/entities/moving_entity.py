@@ -4,6 +4,8 @@ from grid_agent.data_structs.simple_data import Vec2D, Action
 from grid_agent.functors.policy import PolicyFun
 from grid_agent.data_structs.state import State
 
+from itertools import accumulate
+from bisect import bisect
 import random as rnd
 
 class MovingEntity:
@@ -12,7 +14,11 @@ class MovingEntity:
     def __init__(self, start_pos: Vec2D, policy: PolicyFun, markov_transition_density: MarkovTransitionDensity) -> None:
         self.__pos: Vec2D = start_pos
         self.__policy: PolicyFun = policy
-        self.__markov_transition_density: MarkovTransitionDensity = markov_transition_density
+        self.__actions: tuple[Action, ...] = tuple(Action(i) for i in range(Action.MAX_EXCLUSIVE))
+        self.__cumulative_probabilities: list[list[float]] = [
+            list(accumulate(markov_transition_density(Action(chosen_action), Action(action)) for action in range(Action.MAX_EXCLUSIVE)))
+            for chosen_action in range(Action.MAX_EXCLUSIVE)
+        ]
 
     def move(self, state: State, valid_state_space: ValidStateSpace) -> Action:
         """Given the ``state`` of the grid and the ``valid_state_space``, move the entity in a valid way and return the performed ``Action``."""
@@ -24,7 +30,9 @@ class MovingEntity:
         return chosen_action
     
     def __get_next_action(self, chosen_action: Action) -> Action:
-        """Given ``chosen_action`` return the actual ``Action`` the entity wil perform."""
-        actions: list[Action] = [Action(i) for i in range(Action.MAX_EXCLUSIVE)]
-        probabilities: list[float] = [self.__markov_transition_density(chosen_action, action) for action in actions]
-        return rnd.choices(actions, probabilities)[0]
\ No newline at end of file
+        """Given ``chosen_action`` return the actual ``Action`` the entity wil perform.
+        
+        It draws the ``Action`` as ``random.choices`` would, without building the intermediate lists.
+        """
+        cumulative_probabilities: list[float] = self.__cumulative_probabilities[chosen_action]
+        return self.__actions[bisect(cumulative_probabilities, rnd.random() * cumulative_probabilities[-1], 0, Action.MAX_EXCLUSIVE - 1)]
\ No newline at end of file
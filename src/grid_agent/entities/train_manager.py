@@ -1,23 +1,22 @@
 from grid_agent.data_structs.value_functions_container import ValueFunctionsContainer
-from grid_agent.functors.markov_transition_density import MarkovTransitionDensity
 from grid_agent.data_structs.valid_state_space import ValidStateSpace
-from grid_agent.data_structs.simple_data import Action, c_floats
 from grid_agent.entities.parallel_train import ProcessSharedData
+from grid_agent.entities.transition_tables import TransitionTables
 import grid_agent.entities.parallel_train as parallel_train
 from grid_agent.configs.train_configs import TrainConfigs
-from grid_agent.functors.reward import RewardFunction
 from grid_agent.data_structs.policy import Policy
-from grid_agent.data_structs.state import State
 
 from multiprocessing.synchronize import Event, Semaphore
 from multiprocessing.context import DefaultContext
 from multiprocessing.sharedctypes import RawArray
 from multiprocessing import Process
+from ctypes import c_double
 import multiprocessing as mp
 
 from collections.abc import Callable
 from dataclasses import dataclass
 from copy import copy
+import numpy as np
 import math
 
 @dataclass
@@ -73,17 +72,13 @@ class TrainManager:
         self.__valid_states_space: ValidStateSpace = train_configuration.valid_state_space
         self.__policy: Policy = train_configuration.policy
         self.__value_functions_container: ValueFunctionsContainer = train_configuration.value_functions_container
-        self.__reward: RewardFunction = train_configuration.reward
-        self.__markov_transition_density: MarkovTransitionDensity = train_configuration.agent_markov_transition_density
-        self.__actions: list[Action] = [Action(i) for i in range(Action.MAX_EXCLUSIVE)]
-        self.__actions_probabilities: list[float] = [0.0 for i in self.__actions]
-        self.__next_states: list[State] = [State() for i in self.__actions]
-        self.__next_states_values: list[float] = [0.0 for i in self.__actions]
+        self.__transition_tables: TransitionTables = TransitionTables(self.__valid_states_space, train_configuration.reward,
+                                                                      train_configuration.agent_markov_transition_density)
+        self.__improved_values: np.ndarray | None = None
 
     def __init_parallel(self, train_configuration: TrainConfigs) -> None:
         """Initialization for the parallel case."""
         context: DefaultContext = mp.get_context()
-        value_type: type[c_floats] = train_configuration.value_functions_container.get_type()
         self.__valid_state_space_size: int = train_configuration.valid_state_space.space_size
         self.__shared_data: ProcessSharedData = ProcessSharedData(
             valid_state_space= train_configuration.valid_state_space,
@@ -92,15 +87,11 @@ class TrainManager:
             reward= train_configuration.reward,
             markov_transition_density= train_configuration.agent_markov_transition_density,
             discount_rate= train_configuration.discount_factor,
-            actions= [Action(i) for i in range(Action.MAX_EXCLUSIVE)],
-            next_states= [State() for _ in range(Action.MAX_EXCLUSIVE)],
-            next_states_values= [0.0 for _ in range (Action.MAX_EXCLUSIVE)],
-            probabilities= [0.0 for _ in range(Action.MAX_EXCLUSIVE)],
             policy_event= Event(ctx=context),
             value_event= Event(ctx=context),
             semaphore= Semaphore(value=0, ctx=context),
-            max_differences= RawArray(value_type, self.__processes_number),
-            partial_values_sums= RawArray(value_type, self.__processes_number),
+            max_differences= RawArray(c_double, self.__processes_number),
+            partial_values_sums= RawArray(c_double, self.__processes_number),
             partial_changed_actions= RawArray(train_configuration.valid_state_space.type, self.__processes_number)
         )
         intervals: list[tuple[int, int]] = self.__get_processes_intervals()
@@ -185,61 +176,28 @@ class TrainManager:
         self.__traindata.max_value_diff = 0.0
 
     def __evaluate_policy_sequential(self) -> None:
-        """Sequential policy evaluation step."""
-        for index, state in enumerate(self.__valid_states_space):
-            action: Action = self.__policy.get_action(index)
-            new_value: float = self.__calculate_new_value_function_value(state, index, action)
-            old_value: float = self.__value_functions_container.get_current_value(index)
-            diff: float = abs(new_value - old_value)
-            if diff > self.__traindata.max_value_diff:
-                self.__traindata.max_value_diff = diff
-            self.__traindata.mean_value += new_value
-            self.__value_functions_container.set_next_value(index, new_value)
+        """Sequential policy evaluation step.
+        
+        After the first iteration it reuses the values computed by the policy improvement step for the new ``Action``s.
+        """
+        new_values: np.ndarray
+        if self.__improved_values is None:
+            actions: np.ndarray = self.__policy.get_actions(slice(None))
+            new_values = self.__transition_tables.get_values(actions, self.__value_functions_container.get_current_view(), self.__discount_factor)
+        else:
+            new_values = self.__improved_values
+        self.__value_functions_container.set_next_values(slice(None), new_values)
+        self.__traindata.max_value_diff = self.__value_functions_container.get_max_difference()
+        self.__traindata.mean_value = self.__value_functions_container.get_next_values_sum() / self.__valid_states_space.space_size
         self.__value_functions_container.swap_value_functions()
-        self.__traindata.mean_value /= self.__valid_states_space.space_size
     
     def __improve_policy_sequential(self) -> None:
         """Sequential policy improvement step."""
-        for index, state in zip(range(self.__valid_states_space.space_size -1, -1, -1), reversed(self.__valid_states_space)):
-            new_action: Action = max(self.__actions, key=lambda action: self.__mask_actions(state, index, action))
-            old_action: Action = self.__policy.get_action(index)
-            if new_action != old_action:
-                self.__traindata.changed_actions_number += 1
-                self.__policy.set_action(index, new_action)
+        new_actions, self.__improved_values = self.__transition_tables.get_best_actions(self.__value_functions_container.get_current_view(), self.__discount_factor)
+        self.__traindata.changed_actions_number = int(np.count_nonzero(new_actions != self.__policy.get_actions(slice(None))))
+        self.__policy.set_actions(slice(None), new_actions)
         self.__traindata.changed_actions_percentage = self.__traindata.changed_actions_number / self.__valid_states_space.space_size
     
-    def __calculate_new_value_function_value(self, state: State, state_index:int, chosen_action: Action, knows_chosen_action_is_valid: bool = False) -> float:
-        """Return the value of ``state``, of index ``state_index``, given that the current ``Policy`` returned ``chosen_action``.
-        
-        ``knows_chosen_action_is_valid`` is a ``bool`` used to speed up the processing if the user already knows that ``chosen_action`` brings to a valid ``State``.
-        """
-        for next_state, action in zip(self.__next_states, self.__actions):
-            self.__actions_probabilities[action] = self.__markov_transition_density(chosen_action, action)
-            if self.__actions_probabilities[action] == 0.0:
-                continue
-            next_state.copy(state)
-            next_state.move_checking_bounds(next_state.agent_pos, action, self.__valid_states_space.map_size)
-            if (knows_chosen_action_is_valid and action == chosen_action) or self.__valid_states_space.is_state_outside_obstacles(next_state):
-                self.__next_states_values[action] = self.__value_functions_container.get_current_value(self.__valid_states_space.get_valid_index(next_state))
-            else:
-                self.__next_states_values[action] = self.__value_functions_container.get_current_value(state_index)
-        return (self.__reward(state, self.__next_states[chosen_action]) +
-                self.__discount_factor * sum([next_state_value * probability for next_state_value, probability in zip(self.__next_states_values, self.__actions_probabilities)]))
-
-    def __mask_actions(self, state: State, state_index: int, action: Action) -> float:
-        """Return the value of performing ``action`` when the state is ``state``, of index ``state_index``.
-        
-        If ``action`` brings to an invalid ``State`` return ``-inf``.
-        """
-        is_valid: bool = state.move_checking_bounds(state.agent_pos, action, self.__valid_states_space.map_size)
-        if not is_valid:
-            return -math.inf
-        is_valid = self.__valid_states_space.is_state_outside_obstacles(state)
-        state.agent_pos.undo(action)
-        if not is_valid:
-            return -math.inf
-        return self.__calculate_new_value_function_value(state, state_index, action, is_valid)
-    
     def __evaluate_policy_parallel(self) -> None:
         """Parallel policy evaluation step."""
         self.__shared_data.value_event.set()
@@ -0,0 +1,102 @@
+from grid_agent.functors.markov_transition_density import MarkovTransitionDensity
+from grid_agent.data_structs.state import PositionsArrays, positions_to_indices
+from grid_agent.data_structs.valid_state_space import ValidStateSpace
+from grid_agent.data_structs.simple_data import Action, Vec2D
+from grid_agent.functors.reward import RewardFunction
+
+import numpy as np
+
+def builtin_sum(terms: list[np.ndarray]) -> np.ndarray:
+    """Sum elementwise the arrays in ``terms``, in order, as the built-in ``sum`` does with floats.
+
+    The built-in ``sum`` uses the Neumaier compensated summation, so a plain sum of the arrays could differ in the last bits.
+    """
+    result: np.ndarray = terms[0]
+    compensation: np.ndarray = np.zeros_like(result)
+    for term in terms[1:]:
+        total: np.ndarray = result + term
+        compensation += np.where(np.abs(result) >= np.abs(term), (result - total) + term, (term - total) + result)
+        result = total
+    return np.where((compensation != 0.0) & np.isfinite(compensation), result + compensation, result)
+
+class TransitionTables:
+    """The tables describing the transitions from the valid ``State``s in [``start``, ``end``).
+
+    They make possible to execute the steps of the policy iteration algorithm on all those ``State``s at once.
+
+    For each ``State`` and ``Action`` they contain:
+    - the valid index of the next ``State``, that is the ``State`` itself if the ``Action`` brings out of bounds or into an obstacle,
+    - whether the ``Action`` can be chosen, that is if it doesn't bring out of bounds or into an obstacle,
+    - the reward of choosing the ``Action``.
+    """
+    def __init__(self, valid_state_space: ValidStateSpace, reward: RewardFunction, markov_transition_density: MarkovTransitionDensity,
+                 start: int = 0, end: int | None = None) -> None:
+        """Compute the tables of the valid ``State``s in [``start``, ``end``) of ``valid_state_space``.
+
+        ``reward`` and ``markov_transition_density`` are the ones used for learning.
+        """
+        end = valid_state_space.space_size if end is None else end
+        actions: list[Action] = [Action(i) for i in range(Action.MAX_EXCLUSIVE)]
+        positions: PositionsArrays = valid_state_space.get_positions_arrays(start, end)
+        states_indices: np.ndarray = positions_to_indices(positions, valid_state_space.map_size)
+        valid_indices: np.ndarray = np.arange(start, end)
+        self.__next_valid_indices: np.ndarray = np.empty((end - start, len(actions)), dtype=np.int64)
+        self.__is_action_possible: np.ndarray = np.empty((end - start, len(actions)), dtype=np.bool_)
+        self.__rewards: np.ndarray = np.empty((end - start, len(actions)), dtype=np.float64)
+        self.__probabilities: np.ndarray = np.array([[markov_transition_density(chosen_action, action) for action in actions]
+                                                     for chosen_action in actions], dtype=np.float64)
+        for action in actions:
+            next_states_indices, is_within_bounds = self.__move_agent(positions, action, valid_state_space)
+            next_valid_indices: np.ndarray = valid_state_space.get_valid_indices(next_states_indices)
+            is_next_state_valid: np.ndarray = next_valid_indices > -1
+            self.__next_valid_indices[:, action] = np.where(is_next_state_valid, next_valid_indices, valid_indices)
+            self.__is_action_possible[:, action] = is_within_bounds & is_next_state_valid
+            self.__rewards[:, action] = reward.get_rewards(states_indices, next_states_indices, valid_state_space.map_size)
+
+    def __move_agent(self, positions: PositionsArrays, action: Action, valid_state_space: ValidStateSpace) -> tuple[np.ndarray, np.ndarray]:
+        """Move the agent of the ``State``s at ``positions`` according to ``action``, without leaving the bounds.
+
+        Return the indices of the moved ``State``s and whether the agent stayed within bounds.
+        """
+        agent_x, agent_y, opponent_x, opponent_y, target_x, target_y = positions
+        offset: Vec2D = Vec2D()
+        offset.move(action)
+        next_agent_x: np.ndarray = agent_x + offset.x
+        next_agent_y: np.ndarray = agent_y + offset.y
+        is_within_bounds: np.ndarray = ((next_agent_x > -1) & (next_agent_x < valid_state_space.map_size.N) &
+                                        (next_agent_y > -1) & (next_agent_y < valid_state_space.map_size.M))
+        next_agent_x = np.where(is_within_bounds, next_agent_x, agent_x)
+        next_agent_y = np.where(is_within_bounds, next_agent_y, agent_y)
+        next_positions: PositionsArrays = (next_agent_x, next_agent_y, opponent_x, opponent_y, target_x, target_y)
+        return positions_to_indices(next_positions, valid_state_space.map_size), is_within_bounds
+
+    def get_values(self, actions: np.ndarray, values: np.ndarray, discount_factor: float) -> np.ndarray:
+        """Return the new values of the ``State``s, given that the current ``Policy`` chooses ``actions`` in them.
+
+        ``values`` are the values of all the valid ``State``s according to the current ``Policy``.
+        """
+        next_values: np.ndarray = values[self.__next_valid_indices]
+        probabilities: np.ndarray = self.__probabilities[actions]
+        expected_value: np.ndarray = builtin_sum([probabilities[:, action] * next_values[:, action]
+                                                  for action in range(next_values.shape[1])])
+        return np.take_along_axis(self.__rewards, actions[:, np.newaxis], axis=1)[:, 0] + discount_factor * expected_value
+
+    def get_best_actions(self, values: np.ndarray, discount_factor: float) -> tuple[np.ndarray, np.ndarray]:
+        """Return the ``Action``s with the highest value in each ``State``, among the ones that can be chosen, and their values.
+
+        ``values`` are the values of all the valid ``State``s according to the current ``Policy``.
+        Ties are broken in favour of the ``Action`` that comes first.
+
+        The returned values are the ones ``get_values`` would return for the returned ``Action``s and the same ``values``,
+        so they can be used as the result of the next policy evaluation step.
+        """
+        next_values: np.ndarray = values[self.__next_valid_indices]
+        actions_number: int = next_values.shape[1]
+        actions_values: np.ndarray = np.empty(next_values.shape, dtype=np.float64)
+        for chosen_action in range(actions_number):
+            probabilities: np.ndarray = self.__probabilities[chosen_action]
+            expected_value: np.ndarray = builtin_sum([probabilities[action] * next_values[:, action]
+                                                      for action in range(actions_number)])
+            actions_values[:, chosen_action] = self.__rewards[:, chosen_action] + discount_factor * expected_value
+        best_actions: np.ndarray = np.argmax(np.where(self.__is_action_possible, actions_values, -np.inf), axis=1)
+        return best_actions, np.take_along_axis(actions_values, best_actions[:, np.newaxis], axis=1)[:, 0]
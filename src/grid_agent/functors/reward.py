@@ -1,7 +1,8 @@
-from grid_agent.data_structs.simple_data import Vec2D
-from grid_agent.data_structs.state import State
+from grid_agent.data_structs.simple_data import Vec2D, MapSize
+from grid_agent.data_structs.state import State, PositionsArrays, indices_to_positions
 from abc import ABC, abstractmethod
 from typing import override
+import numpy as np
 
 def manhattan_distance(point_a: Vec2D, point_b: Vec2D) -> int:
     """Calculate the manhattan distance between ``point_a`` and ``point_b``."""
@@ -15,6 +16,20 @@ class RewardFunction(ABC):
         """Return the reward of being in ``state`` and doing an ``Action`` that brings to ``next_state``."""
         ...
 
+    def get_rewards(self, states_indices: np.ndarray, next_states_indices: np.ndarray, map_size: MapSize) -> np.ndarray:
+        """Return the rewards of being in the ``State``s of index ``states_indices`` and doing ``Action``s that bring to the ``State``s of index ``next_states_indices``.
+        
+        It calls the functor once per pair of ``State``s; subclasses can override it with a vectorized implementation.
+        """
+        state: State = State()
+        next_state: State = State()
+        rewards: np.ndarray = np.empty(len(states_indices), dtype=np.float64)
+        for k, (state_index, next_state_index) in enumerate(zip(states_indices.tolist(), next_states_indices.tolist())):
+            state.from_index(state_index, map_size)
+            next_state.from_index(next_state_index, map_size)
+            rewards[k] = self(state, next_state)
+        return rewards
+
 class DenseRewardFunction(RewardFunction):
     """A dense ``RewardFunction``.
     
@@ -29,18 +44,35 @@ class DenseRewardFunction(RewardFunction):
 
     @override
     def __call__(self, state: State, next_state: State) -> float:
-        if state.agent_pos == state.target_pos:
+        agent_pos: Vec2D = state.agent_pos
+        if agent_pos.x == state.target_pos.x and agent_pos.y == state.target_pos.y:
             return 1.0
-        if state.agent_pos == state.opponent_pos:
+        if agent_pos.x == state.opponent_pos.x and agent_pos.y == state.opponent_pos.y:
             return -1.0
-        if next_state.agent_pos == next_state.target_pos:
+        agent_pos = next_state.agent_pos
+        if agent_pos.x == next_state.target_pos.x and agent_pos.y == next_state.target_pos.y:
             return 0.25
-        if next_state.agent_pos == next_state.opponent_pos:
+        opponent_pos: Vec2D = next_state.opponent_pos
+        distance_from_opponent: int = abs(agent_pos.x - opponent_pos.x) + abs(agent_pos.y - opponent_pos.y)
+        if distance_from_opponent == 0:
             return -0.25
-        if manhattan_distance(next_state.agent_pos, next_state.opponent_pos) == 1:
+        if distance_from_opponent == 1:
             return -0.1
         return -0.01
 
+    @override
+    def get_rewards(self, states_indices: np.ndarray, next_states_indices: np.ndarray, map_size: MapSize) -> np.ndarray:
+        agent_x, agent_y, opponent_x, opponent_y, target_x, target_y = indices_to_positions(states_indices, map_size)
+        next_positions: PositionsArrays = indices_to_positions(next_states_indices, map_size)
+        next_agent_x, next_agent_y, next_opponent_x, next_opponent_y, next_target_x, next_target_y = next_positions
+        distance_from_opponent: np.ndarray = np.abs(next_agent_x - next_opponent_x) + np.abs(next_agent_y - next_opponent_y)
+        return np.select([(agent_x == target_x) & (agent_y == target_y),
+                          (agent_x == opponent_x) & (agent_y == opponent_y),
+                          (next_agent_x == next_target_x) & (next_agent_y == next_target_y),
+                          distance_from_opponent == 0,
+                          distance_from_opponent == 1],
+                         [1.0, -1.0, 0.25, -0.25, -0.1], -0.01)
+
 class SparseRewardFunction(RewardFunction):
     """A sparse ``RewardFunction``.
     
@@ -52,8 +84,16 @@ class SparseRewardFunction(RewardFunction):
 
     @override
     def __call__(self, state: State, next_state: State) -> float:
-        if state.agent_pos == state.target_pos:
+        agent_pos: Vec2D = state.agent_pos
+        if agent_pos.x == state.target_pos.x and agent_pos.y == state.target_pos.y:
             return 1.0
-        if state.agent_pos == state.opponent_pos:
+        if agent_pos.x == state.opponent_pos.x and agent_pos.y == state.opponent_pos.y:
             return -1.0
-        return 0.0
\ No newline at end of file
+        return 0.0
+
+    @override
+    def get_rewards(self, states_indices: np.ndarray, next_states_indices: np.ndarray, map_size: MapSize) -> np.ndarray:
+        agent_x, agent_y, opponent_x, opponent_y, target_x, target_y = indices_to_positions(states_indices, map_size)
+        return np.select([(agent_x == target_x) & (agent_y == target_y),
+                          (agent_x == opponent_x) & (agent_y == opponent_y)],
+                         [1.0, -1.0], 0.0)
\ No newline at end of file